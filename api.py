@@ -3,26 +3,59 @@
 from __future__ import annotations
 
 import tempfile
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Literal
 
-# Stub ChromaDB default embedding function so onnxruntime is never loaded (avoids
-# DLL error on Windows). We use embedding_function=None and Vertex AI embeddings.
-from chromadb_embedding_stub import install_stub
+# Imported first so startup timings are measured from the start of the process.
+import startup
 
-install_stub()
-
-from fastapi import FastAPI, HTTPException, Query, UploadFile
+from fastapi import FastAPI, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-
-from config import get_base_path_resolved, validate_config
-from chroma_store import collection_count, search as chroma_search
+from pydantic import BaseModel, Field
+
+from config import (
+    CLUSTER_GROUPS,
+    ENABLE_SERVER_TIMING,
+    MAX_DEEP_RESULTS,
+    MMR_DIVERSITY,
+    RERANK_MODE,
+    WARMUP_ON_STARTUP,
+    get_base_path_resolved,
+    validate_config,
+)
+from chroma_store import (
+    EMBEDDING_DIMENSION,
+    collection_count,
+    shard_sizes,
+)
 from embedding import get_image_embedding, get_text_embedding
-from indexing import index_folder
+from indexing import index_folder, rebuild_shard
+from search_cache import continue_search, search_top_k, start_search
+from metrics import (
+    REQUEST_LATENCY,
+    REQUESTS,
+    begin_request_timing,
+    record_error,
+    render_prometheus,
+    server_timing_header,
+)
 
-app = FastAPI(title="Local Image Search", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start warming Chroma and the embedding model without blocking startup."""
+    startup.mark("app_started")
+    if WARMUP_ON_STARTUP:
+        startup.start_warmup()
+    yield
+
+
+app = FastAPI(title="Local Image Search", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,9 +63,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record per-endpoint latency and status; add Server-Timing when enabled."""
+    startup.mark("first_request")
+    timings = begin_request_timing()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    except Exception as e:
+        record_error(e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        # Route template (e.g. /search/similar), not the raw URL, to bound label cardinality
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", None) or ("/" if route else "unmatched")
+        REQUEST_LATENCY.observe(elapsed, method=request.method, endpoint=endpoint)
+        REQUESTS.inc(method=request.method, endpoint=endpoint, status=str(status))
+    if ENABLE_SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+
 def _safe_path_for_serving(path_param: str) -> Path:
     """Resolve path_param under base; raise HTTPException if invalid."""
     base = get_base_path_resolved()
@@ -50,6 +109,10 @@ def _safe_path_for_serving(path_param: str) -> Path:
     return path
 
 
+# "mmr" diversifies near-duplicate bursts, "cluster" groups results (see rerank.py)
+RerankMode = Literal["none", "mmr", "cluster"]
+
+
 class IndexRequest(BaseModel):
     """Request body for POST /index."""
 
@@ -57,6 +120,12 @@ class IndexRequest(BaseModel):
     collection_name: str = "images"
 
 
+class ShardIndexRequest(IndexRequest):
+    """Request body for POST /index/shard."""
+
+    shard: int
+
+
 class IndexResponse(BaseModel):
     """Response for POST /index."""
 
@@ -69,8 +138,12 @@ class SearchRequest(BaseModel):
 
     query_text: str | None = None
     query_image_path: str | None = None
-    top_k: int = 10
+    top_k: int = Field(10, ge=1, le=100)
     collection_name: str = "images"
+    cursor: str | None = None
+    rerank: RerankMode = RERANK_MODE
+    diversity: float = Field(MMR_DIVERSITY, ge=0.0, le=1.0)
+    groups: int = Field(CLUSTER_GROUPS, ge=1, le=50)
 
 
 class SearchResultItem(BaseModel):
@@ -79,17 +152,72 @@ class SearchResultItem(BaseModel):
     path: str
     score: float
     rank: int
+    group: int | None = None
 
 
 class SearchResponse(BaseModel):
     """Response for search endpoints."""
 
     results: list[SearchResultItem]
+    next_cursor: str | None = None
+
+
+def _page_response(
+    hits: list[dict],
+    next_cursor: str | None,
+    offset: int = 0,
+) -> SearchResponse:
+    """Build a search response page; ranks continue from offset."""
+    results = [
+        SearchResultItem(
+            path=h["path"],
+            score=round(h["score"], 4),
+            rank=offset + i + 1,
+            group=h.get("group"),
+        )
+        for i, h in enumerate(hits)
+    ]
+    return SearchResponse(results=results, next_cursor=next_cursor)
+
+
+def _continue_page(cursor: str, page_size: int) -> SearchResponse:
+    """Serve the page a cursor points at; 410 if its session has expired."""
+    try:
+        hits, offset, next_cursor = continue_search(cursor, page_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except LookupError as e:
+        raise HTTPException(status_code=410, detail=str(e)) from e
+    return _page_response(hits, next_cursor, offset)
+
+
+@app.get("/health/live")
+def health_live() -> dict:
+    """Liveness: the process is up and serving; no SDKs or index required."""
+    return {"status": "ok", "uptime_seconds": round(startup.elapsed(), 3)}
+
+
+@app.get("/health/ready")
+def health_ready() -> JSONResponse:
+    """Readiness: Chroma index and embedding model are loaded (503 until warm).
+
+    With WARMUP_ON_STARTUP=0 the first readiness probe starts the warm-up, so a
+    probe never waits on a load that would otherwise only happen on first use.
+    """
+    startup.start_warmup()
+    state = startup.readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+@app.get("/debug/startup")
+def debug_startup() -> dict:
+    """Startup profile: milestones, heavy-import times and warm-up state."""
+    return startup.report()
 
 
 @app.get("/health")
 def health() -> dict:
-    """Readiness: validate config and Chroma."""
+    """Full check: validate config and Chroma (loads chromadb if not yet warm)."""
     try:
         validate_config()
         collection_count()
@@ -98,14 +226,24 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Prometheus text-format metrics."""
+    return PlainTextResponse(
+        render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/stats")
 def stats(collection_name: str = Query("images")) -> dict:
     """Get collection statistics."""
-    count = collection_count(collection_name=collection_name)
+    shards = shard_sizes(collection_name=collection_name)
     return {
         "collection_name": collection_name,
-        "total_images": count,
-        "embedding_dimension": 1408,
+        "total_images": sum(s["count"] for s in shards),
+        "embedding_dimension": EMBEDDING_DIMENSION,
+        "shards": shards,
     }
 
 
@@ -158,19 +296,47 @@ def index(request: IndexRequest) -> IndexResponse:
                 image_files = [f for f in all_files if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS]
                 logger.warning(f"Indexed 0 images from {request.folder_path}. Found {len(image_files)} image files but embeddings failed.")
     except ValueError as e:
+        record_error(e)
         raise HTTPException(status_code=400, detail=str(e)) from e
     except RuntimeError as e:
+        record_error(e)
         raise HTTPException(status_code=500, detail=str(e)) from e
     except Exception as e:
+        record_error(e)
         import logging
         logging.getLogger(__name__).exception("Unexpected error during indexing")
         raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}") from e
     return IndexResponse(indexed=n, collection_name=request.collection_name)
 
 
+@app.post("/index/shard", response_model=IndexResponse)
+def index_shard(request: ShardIndexRequest) -> IndexResponse:
+    """Rebuild a single shard of a collection from its source folder."""
+    try:
+        n = rebuild_shard(
+            folder_path=request.folder_path,
+            shard=request.shard,
+            collection_name=request.collection_name,
+        )
+    except ValueError as e:
+        record_error(e)
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except RuntimeError as e:
+        record_error(e)
+        raise HTTPException(status_code=500, detail=str(e)) from e
+    except Exception as e:
+        record_error(e)
+        import logging
+        logging.getLogger(__name__).exception("Unexpected error during shard rebuild")
+        raise HTTPException(status_code=500, detail=f"Shard rebuild failed: {str(e)}") from e
+    return IndexResponse(indexed=n, collection_name=request.collection_name)
+
+
 @app.post("/search", response_model=SearchResponse)
 def search_post(request: SearchRequest) -> SearchResponse:
-    """Search by text and/or image path."""
+    """Search by text and/or image path, or fetch the next page for a cursor."""
+    if request.cursor:
+        return _continue_page(request.cursor, request.top_k)
     if not request.query_text and not request.query_image_path:
         raise HTTPException(
             status_code=400,
@@ -184,24 +350,27 @@ def search_post(request: SearchRequest) -> SearchResponse:
         query_embedding = get_image_embedding(str(path))
     if not query_embedding:
         raise HTTPException(status_code=400, detail="Could not compute query embedding")
-    hits = chroma_search(
+    hits, next_cursor = start_search(
         query_embedding=query_embedding,
-        top_k=request.top_k,
         collection_name=request.collection_name,
+        page_size=request.top_k,
+        rerank=request.rerank,
+        diversity=request.diversity,
+        groups=request.groups,
     )
-    results = [
-        SearchResultItem(path=h["path"], score=round(h["score"], 4), rank=i + 1)
-        for i, h in enumerate(hits)
-    ]
-    return SearchResponse(results=results)
+    return _page_response(hits, next_cursor)
 
 
 class BatchSearchRequest(BaseModel):
     """Request body for POST /search/batch."""
 
     queries: list[str]
-    top_k: int = 10
+    # No cursor for batch results, so allow up to the deepest result a search can reach
+    top_k: int = Field(10, ge=1, le=MAX_DEEP_RESULTS)
     collection_name: str = "images"
+    rerank: RerankMode = RERANK_MODE
+    diversity: float = Field(MMR_DIVERSITY, ge=0.0, le=1.0)
+    groups: int = Field(CLUSTER_GROUPS, ge=1, le=50)
 
 
 @app.post("/search/batch", response_model=dict)
@@ -211,14 +380,21 @@ def search_batch(request: BatchSearchRequest) -> dict:
         raise HTTPException(status_code=400, detail="Provide 1-10 queries")
     all_results = {}
     for q in request.queries:
-        query_embedding = get_text_embedding(q)
-        hits = chroma_search(
-            query_embedding=query_embedding,
-            top_k=request.top_k,
+        hits = search_top_k(
+            query_embedding=get_text_embedding(q),
             collection_name=request.collection_name,
+            top_k=request.top_k,
+            rerank=request.rerank,
+            diversity=request.diversity,
+            groups=request.groups,
         )
         all_results[q] = [
-            {"path": h["path"], "score": round(h["score"], 4), "rank": i + 1}
+            {
+                "path": h["path"],
+                "score": round(h["score"], 4),
+                "rank": i + 1,
+                **({"group": h["group"]} if "group" in h else {}),
+            }
             for i, h in enumerate(hits)
         ]
     return {"queries": all_results}
@@ -230,41 +406,50 @@ def search_similar(
     top_k: int = Query(10, ge=1, le=50),
     min_score: float = Query(0.0, ge=0.0, le=1.0),
     collection_name: str = Query("images"),
+    rerank: RerankMode = Query(RERANK_MODE),
+    diversity: float = Query(MMR_DIVERSITY, ge=0.0, le=1.0),
+    groups: int = Query(CLUSTER_GROUPS, ge=1, le=50),
 ) -> SearchResponse:
     """Find images similar to a given indexed image path."""
     safe_path = _safe_path_for_serving(path)
     query_embedding = get_image_embedding(str(safe_path))
-    hits = chroma_search(
+    hits, next_cursor = start_search(
         query_embedding=query_embedding,
-        top_k=top_k * 2,  # Get more to filter by min_score
         collection_name=collection_name,
+        page_size=top_k,
+        min_score=min_score,
+        rerank=rerank,
+        diversity=diversity,
+        groups=groups,
     )
-    filtered = [h for h in hits if h["score"] >= min_score][:top_k]
-    results = [
-        SearchResultItem(path=h["path"], score=round(h["score"], 4), rank=i + 1)
-        for i, h in enumerate(filtered)
-    ]
-    return SearchResponse(results=results)
+    return _page_response(hits, next_cursor)
 
 
 @app.get("/search", response_model=SearchResponse)
 def search_get(
-    q: str = Query(..., min_length=1),
+    q: str | None = Query(None, min_length=1),
     top_k: int = Query(10, ge=1, le=100),
     collection_name: str = Query("images"),
+    cursor: str | None = Query(None),
+    rerank: RerankMode = Query(RERANK_MODE),
+    diversity: float = Query(MMR_DIVERSITY, ge=0.0, le=1.0),
+    groups: int = Query(CLUSTER_GROUPS, ge=1, le=50),
 ) -> SearchResponse:
-    """Search by text query (GET)."""
+    """Search by text query (GET), or fetch the next page for a cursor from any search."""
+    if cursor:
+        return _continue_page(cursor, top_k)
+    if not q:
+        raise HTTPException(status_code=400, detail="Provide q or cursor")
     query_embedding = get_text_embedding(q)
-    hits = chroma_search(
+    hits, next_cursor = start_search(
         query_embedding=query_embedding,
-        top_k=top_k,
         collection_name=collection_name,
+        page_size=top_k,
+        rerank=rerank,
+        diversity=diversity,
+        groups=groups,
     )
-    results = [
-        SearchResultItem(path=h["path"], score=round(h["score"], 4), rank=i + 1)
-        for i, h in enumerate(hits)
-    ]
-    return SearchResponse(results=results)
+    return _page_response(hits, next_cursor)
 
 
 @app.get("/files")
@@ -280,6 +465,9 @@ async def search_by_upload(
     file: UploadFile,
     top_k: int = Query(10, ge=1, le=100),
     collection_name: str = Query("images"),
+    rerank: RerankMode = Query(RERANK_MODE),
+    diversity: float = Query(MMR_DIVERSITY, ge=0.0, le=1.0),
+    groups: int = Query(CLUSTER_GROUPS, ge=1, le=50),
 ) -> SearchResponse:
     """Search using an uploaded image file."""
     if not file.content_type or not file.content_type.startswith("image/"):
@@ -291,16 +479,15 @@ async def search_by_upload(
         tmp_path = tmp.name
     try:
         query_embedding = get_image_embedding(tmp_path)
-        hits = chroma_search(
+        hits, next_cursor = start_search(
             query_embedding=query_embedding,
-            top_k=top_k,
             collection_name=collection_name,
+            page_size=top_k,
+            rerank=rerank,
+            diversity=diversity,
+            groups=groups,
         )
-        results = [
-            SearchResultItem(path=h["path"], score=round(h["score"], 4), rank=i + 1)
-            for i, h in enumerate(hits)
-        ]
-        return SearchResponse(results=results)
+        return _page_response(hits, next_cursor)
     finally:
         Path(tmp_path).unlink(missing_ok=True)
 
@@ -314,3 +501,5 @@ if _frontend_vite_dir.is_dir():
     app.mount("/", StaticFiles(directory=str(_frontend_vite_dir), html=True), name="frontend")
 elif _frontend_dir.is_dir():
     app.mount("/", StaticFiles(directory=str(_frontend_dir), html=True), name="frontend")
+
+startup.mark("api_imported")
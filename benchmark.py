@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for the indexing and search hot paths.
+
+Runs against a throwaway Chroma directory and a synthetic image tree, with
+EMBEDDING_BACKEND=fake so no Vertex AI calls are made. Results are written as
+JSON so runs can be compared over time.
+
+Usage:
+    python benchmark.py --output bench.json
+    python benchmark.py --sizes 10000,100000 --dimension 256 --benchmarks query
+
+API benchmarks (batch search, /files) use FastAPI's TestClient, which needs httpx.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ALL_BENCHMARKS = ("scan", "embed", "index", "add", "query", "batch", "files")
+
+# Minimal PNG signature so synthetic files look like images to anything sniffing them
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Dimension the API embeds queries at (embedding.py default)
+EMBEDDING_DIMENSION = 1408
+
+
+def _configure_environment(work_dir: Path) -> None:
+    """Point the app at the work dir and the fake backend before it is imported."""
+    os.environ["EMBEDDING_BACKEND"] = "fake"
+    os.environ["CHROMA_PERSIST_DIR"] = str(work_dir / "chroma_data")
+    os.environ["IMAGE_BASE_PATH"] = str(work_dir)
+
+
+def _latency_stats(samples: list[float]) -> dict:
+    """Summarize latency samples (seconds) as milliseconds."""
+    import numpy as np
+
+    arr = np.asarray(samples) * 1000.0
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+        "min_ms": round(float(arr.min()), 3),
+        "max_ms": round(float(arr.max()), 3),
+    }
+
+
+def make_image_tree(root: Path, count: int, image_bytes: int, fanout: int = 20) -> Path:
+    """Write count synthetic image files under root in a nested directory tree."""
+    import numpy as np
+
+    from indexing import IMAGE_EXTENSIONS
+
+    rng = np.random.default_rng(0)
+    extensions = sorted(IMAGE_EXTENSIONS)
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        subdir = root / f"d{i % fanout:02d}" / f"e{(i // fanout) % fanout:02d}"
+        subdir.mkdir(parents=True, exist_ok=True)
+        payload = rng.integers(0, 256, size=image_bytes, dtype=np.uint8).tobytes()
+        ext = extensions[i % len(extensions)]
+        (subdir / f"img_{i:07d}{ext}").write_bytes(_PNG_SIGNATURE + payload)
+    return root
+
+
+def bench_scan(tree: Path, repeat: int) -> dict:
+    """Time the folder scan that feeds the indexer."""
+    from indexing import _collect_image_paths
+
+    samples = []
+    found = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = len(_collect_image_paths(tree))
+        samples.append(time.perf_counter() - start)
+    best = min(samples)
+    return {
+        "files": found,
+        "files_per_sec": round(found / best, 1) if best else None,
+        "latency": _latency_stats(samples),
+    }
+
+
+def bench_embed(tree: Path, dimension: int) -> dict:
+    """Time image embedding alone over every file in the tree."""
+    from embedding import get_image_embedding
+    from indexing import _collect_image_paths
+
+    paths = _collect_image_paths(tree)
+    samples = []
+    start = time.perf_counter()
+    for p in paths:
+        t0 = time.perf_counter()
+        get_image_embedding(str(p), dimension=dimension)
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return {
+        "dimension": dimension,
+        "images": len(paths),
+        "images_per_sec": round(len(paths) / elapsed, 1) if elapsed else None,
+        "latency": _latency_stats(samples),
+    }
+
+
+def bench_index(tree: Path, dimension: int) -> dict:
+    """Time the full index_folder pipeline (scan, embed, Chroma add)."""
+    from indexing import index_folder
+
+    start = time.perf_counter()
+    indexed = index_folder(
+        folder_path=str(tree),
+        collection_name="bench_index",
+        clear_first=True,
+        dimension=dimension,
+    )
+    elapsed = time.perf_counter() - start
+    return {
+        "dimension": dimension,
+        "images": indexed,
+        "seconds": round(elapsed, 3),
+        "images_per_sec": round(indexed / elapsed, 1) if elapsed else None,
+    }
+
+
+def bench_add_and_query(
+    sizes: list[int],
+    dimension: int,
+    queries: int,
+    batch_size: int,
+    run_query: bool,
+) -> dict:
+    """Grow one collection through each size, timing adds and (optionally) queries."""
+    from chroma_store import add_images, clear_collection, search
+    from fake_embedding import random_unit_vectors
+
+    collection_name = "bench_vectors"
+    clear_collection(collection_name=collection_name)
+    query_vecs = random_unit_vectors(queries, dimension, seed=1).tolist()
+
+    add_results = []
+    query_results = []
+    current = 0
+    for target in sorted(sizes):
+        start = time.perf_counter()
+        while current < target:
+            n = min(batch_size, target - current)
+            vecs = random_unit_vectors(n, dimension, seed=current + 2)
+            ids = [f"v{current + j}" for j in range(n)]
+            paths = [f"synthetic/{current + j}.jpg" for j in range(n)]
+            add_images(
+                ids=ids,
+                embeddings=vecs.tolist(),
+                paths=paths,
+                collection_name=collection_name,
+            )
+            current += n
+        elapsed = time.perf_counter() - start
+        add_results.append({"size": target, "dimension": dimension, "seconds": round(elapsed, 3)})
+        if run_query:
+            samples = []
+            for vec in query_vecs:
+                t0 = time.perf_counter()
+                search(query_embedding=vec, top_k=10, collection_name=collection_name)
+                samples.append(time.perf_counter() - t0)
+            query_results.append(
+                {
+                    "size": target,
+                    "dimension": dimension,
+                    "top_k": 10,
+                    "latency": _latency_stats(samples),
+                }
+            )
+
+    added = [
+        {
+            **r,
+            "vectors_added": r["size"] - prev,
+            "vectors_per_sec": round((r["size"] - prev) / r["seconds"], 1)
+            if r["seconds"]
+            else None,
+        }
+        for r, prev in zip(add_results, [0] + [r["size"] for r in add_results[:-1]])
+    ]
+    return {"add": added, "query": query_results}
+
+
+def bench_batch_search(queries: int) -> dict:
+    """Time POST /search/batch with 10 text queries per request."""
+    from fastapi.testclient import TestClient
+
+    from api import app
+
+    client = TestClient(app)
+    samples = []
+    for i in range(queries):
+        body = {
+            "queries": [f"synthetic query {i} {j}" for j in range(10)],
+            "top_k": 10,
+            "collection_name": "bench_index",
+        }
+        t0 = time.perf_counter()
+        resp = client.post("/search/batch", json=body)
+        samples.append(time.perf_counter() - t0)
+        resp.raise_for_status()
+    return {
+        "dimension": EMBEDDING_DIMENSION,
+        "queries_per_request": 10,
+        "latency": _latency_stats(samples),
+    }
+
+
+def bench_files(tree: Path, requests: int) -> dict:
+    """Time GET /files over a sample of the synthetic images."""
+    from fastapi.testclient import TestClient
+
+    from api import app
+    from indexing import _collect_image_paths
+
+    client = TestClient(app)
+    paths = _collect_image_paths(tree)[:requests]
+    samples = []
+    total_bytes = 0
+    start = time.perf_counter()
+    for p in paths:
+        t0 = time.perf_counter()
+        resp = client.get("/files", params={"path": str(p)})
+        samples.append(time.perf_counter() - t0)
+        resp.raise_for_status()
+        total_bytes += len(resp.content)
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(paths),
+        "mb_per_sec": round(total_bytes / elapsed / 1e6, 2) if elapsed else None,
+        "latency": _latency_stats(samples),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local Image Search benchmarks")
+    parser.add_argument(
+        "--benchmarks",
+        default=",".join(ALL_BENCHMARKS),
+        help=f"Comma-separated subset of: {', '.join(ALL_BENCHMARKS)}",
+    )
+    parser.add_argument("--images", type=int, default=2000, help="Synthetic tree size")
+    parser.add_argument("--image-bytes", type=int, default=16384, help="Bytes per image")
+    parser.add_argument(
+        "--sizes",
+        default="10000,100000,1000000",
+        help="Collection sizes for add/query benchmarks",
+    )
+    parser.add_argument(
+        "--dimension",
+        type=int,
+        default=1408,
+        help="Vector dimension for add/query (embed/index use the API's 1408)",
+    )
+    parser.add_argument("--queries", type=int, default=200, help="Queries per measurement")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Vectors per Chroma add")
+    parser.add_argument("--work-dir", help="Directory for data (default: temp, removed after)")
+    parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    args = parser.parse_args()
+
+    selected = [b.strip() for b in args.benchmarks.split(",") if b.strip()]
+    unknown = set(selected) - set(ALL_BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="lis-bench-"))
+    work_dir = work_dir.resolve()
+    _configure_environment(work_dir)
+
+    results: dict = {}
+    try:
+        tree = work_dir / "images"
+        if {"scan", "embed", "index", "batch", "files"} & set(selected):
+            start = time.perf_counter()
+            make_image_tree(tree, args.images, args.image_bytes)
+            results["tree"] = {
+                "images": args.images,
+                "image_bytes": args.image_bytes,
+                "seconds": round(time.perf_counter() - start, 3),
+            }
+        if "scan" in selected:
+            results["scan"] = bench_scan(tree, repeat=5)
+        # The API embeds queries at the default dimension, so the index it
+        # searches (and the embed benchmark) must match it
+        if "embed" in selected:
+            results["embed"] = bench_embed(tree, EMBEDDING_DIMENSION)
+        if "index" in selected or "batch" in selected:
+            results["index"] = bench_index(tree, EMBEDDING_DIMENSION)
+        if "add" in selected or "query" in selected:
+            vector_results = bench_add_and_query(
+                sizes,
+                args.dimension,
+                args.queries,
+                args.batch_size,
+                run_query="query" in selected,
+            )
+            if "add" in selected:
+                results["add"] = vector_results["add"]
+            if "query" in selected:
+                results["query"] = vector_results["query"]
+        if "batch" in selected:
+            results["batch"] = bench_batch_search(args.queries)
+        if "files" in selected:
+            results["files"] = bench_files(tree, args.queries)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "embedding_backend": "fake",
+            "benchmarks": selected,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
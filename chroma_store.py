@@ -1,13 +1,28 @@
-"""ChromaDB persistent store for image embeddings."""
+"""ChromaDB persistent store for image embeddings.
+
+chromadb is imported when the client is first created rather than at module
+load, keeping it off the API's startup path.
+
+A logical collection (e.g. "images") may be split across several physical
+Chroma collections ("images__shard000", ...) when CHROMA_SHARDS > 1. Searches
+fan out to every configured shard concurrently and merge the per-shard top-k.
+Collection handles are cached, so a query does not look collections up by name.
+"""
 
 from __future__ import annotations
 
+import heapq
+import itertools
+import threading
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
-import chromadb
-from chromadb.config import Settings
+from config import CHROMA_PERSIST_DIR, CHROMA_SHARDS, SEARCH_WORKERS
+from metrics import CHROMA_QUERY_LATENCY, timed
 
-from config import CHROMA_PERSIST_DIR
+if TYPE_CHECKING:
+    import chromadb
 
 # Default collection name for the single-session design
 DEFAULT_COLLECTION_NAME = "images"
@@ -15,30 +30,108 @@ DEFAULT_COLLECTION_NAME = "images"
 # Embedding dimension from Vertex AI multimodal model
 EMBEDDING_DIMENSION = 1408
 
-_chroma_client: chromadb.PersistentClient | None = None
+# Physical shard collections are named <logical name><SHARD_SEPARATOR><index>
+SHARD_SEPARATOR = "__shard"
+
+# Max records per Chroma add call (Chroma rejects batches above ~5461)
+ADD_BATCH_SIZE = 5000
+
+_chroma_client: chromadb.ClientAPI | None = None
+_client_lock = threading.Lock()
+_search_pool: ThreadPoolExecutor | None = None
+# Open collection handles by physical name; entries are dropped when deleted
+_collections: dict[str, chromadb.Collection] = {}
+# Serializes creating and deleting collections (Chroma's get_or_create is not atomic)
+_collections_lock = threading.Lock()
 
 
-def _get_client() -> chromadb.PersistentClient:
+def _get_client() -> chromadb.ClientAPI:
     """Return the persistent Chroma client, creating it if needed."""
     global _chroma_client
     if _chroma_client is None:
-        _chroma_client = chromadb.PersistentClient(
-            path=CHROMA_PERSIST_DIR,
-            settings=Settings(anonymized_telemetry=False),
-        )
+        with _client_lock:
+            if _chroma_client is None:
+                # Stub the default embedding function so onnxruntime is never loaded
+                # (avoids DLL error on Windows); we always supply our own embeddings.
+                from chromadb_embedding_stub import install_stub
+                from startup import timed_import
+
+                install_stub()
+                chromadb = timed_import("chromadb")
+                from chromadb.config import Settings
+
+                _chroma_client = chromadb.PersistentClient(
+                    path=CHROMA_PERSIST_DIR,
+                    settings=Settings(anonymized_telemetry=False),
+                )
     return _chroma_client
 
 
+def warm_up(collection_name: str = DEFAULT_COLLECTION_NAME) -> int:
+    """Open the client and default collection ahead of the first request."""
+    return collection_count(collection_name=collection_name)
+
+
 def get_or_create_collection(
     name: str = DEFAULT_COLLECTION_NAME,
 ) -> chromadb.Collection:
     """Get or create a collection. No embedding function; we supply embeddings."""
+    coll = _collections.get(name)
+    if coll is None:
+        client = _get_client()
+        with _collections_lock:
+            coll = _collections.get(name)
+            if coll is None:
+                coll = _collections[name] = client.get_or_create_collection(
+                    name=name,
+                    embedding_function=None,
+                    metadata={"hnsw:space": "cosine"},
+                )
+    return coll
+
+
+def _delete_collection(name: str) -> None:
+    """Delete a physical collection (if it exists) and forget its cached handle."""
     client = _get_client()
-    return client.get_or_create_collection(
-        name=name,
-        embedding_function=None,
-        metadata={"hnsw:space": "cosine"},
-    )
+    with _collections_lock:
+        _collections.pop(name, None)
+        try:
+            client.delete_collection(name=name)
+        except Exception:
+            pass
+
+
+def shard_collection_name(
+    collection_name: str,
+    shard: int,
+    shard_count: int = CHROMA_SHARDS,
+) -> str:
+    """Return the physical collection name for a shard of a logical collection."""
+    if shard_count <= 1:
+        return collection_name
+    return f"{collection_name}{SHARD_SEPARATOR}{shard:03d}"
+
+
+def shard_names(collection_name: str = DEFAULT_COLLECTION_NAME) -> list[str]:
+    """Return the physical collection names for the configured CHROMA_SHARDS."""
+    return [shard_collection_name(collection_name, i) for i in range(max(CHROMA_SHARDS, 1))]
+
+
+def list_shards(collection_name: str = DEFAULT_COLLECTION_NAME) -> list[str]:
+    """Return existing physical collection names belonging to a logical collection.
+
+    Unlike shard_names this lists the database, so it also finds shards left over
+    from a different CHROMA_SHARDS setting.
+    """
+    client = _get_client()
+    prefix = collection_name + SHARD_SEPARATOR
+    names = []
+    for c in client.list_collections():
+        # chromadb < 0.6 returns Collection objects, >= 0.6 returns names
+        name = c if isinstance(c, str) else c.name
+        if name == collection_name or name.startswith(prefix):
+            names.append(name)
+    return sorted(names)
 
 
 def add_images(
@@ -53,51 +146,57 @@ def add_images(
         ids: Unique ids (e.g. path hash or uuid).
         embeddings: List of 1408-dim vectors from Vertex AI.
         paths: Image file paths for metadata.
-        collection_name: Target collection name.
+        collection_name: Target (physical) collection name.
     """
     if len(ids) != len(embeddings) or len(ids) != len(paths):
         raise ValueError("ids, embeddings, and paths must have the same length")
     coll = get_or_create_collection(name=collection_name)
-    metadatas = [{"path": p} for p in paths]
-    coll.add(
-        ids=list(ids),
-        embeddings=list(embeddings),
-        metadatas=metadatas,
-    )
+    for start in range(0, len(ids), ADD_BATCH_SIZE):
+        end = start + ADD_BATCH_SIZE
+        coll.add(
+            ids=list(ids[start:end]),
+            embeddings=list(embeddings[start:end]),
+            metadatas=[{"path": p} for p in paths[start:end]],
+        )
 
 
-def search(
-    query_embedding: list[float],
-    top_k: int = 10,
-    collection_name: str = DEFAULT_COLLECTION_NAME,
-) -> list[dict]:
-    """Search for nearest images by embedding.
+def _get_search_pool() -> ThreadPoolExecutor:
+    """Return the shared thread pool used to query shards concurrently."""
+    global _search_pool
+    if _search_pool is None:
+        with _client_lock:
+            if _search_pool is None:
+                _search_pool = ThreadPoolExecutor(
+                    max_workers=SEARCH_WORKERS, thread_name_prefix="shard-search"
+                )
+    return _search_pool
 
-    Args:
-        query_embedding: Query vector (text or image embedding).
-        top_k: Number of results to return.
-        collection_name: Collection to search.
 
-    Returns:
-        List of dicts with keys: id, path, distance, score.
-        score is 1 - distance for cosine so higher = more similar.
-    """
-    coll = get_or_create_collection(name=collection_name)
+def _search_shard(
+    query_embedding: list[float],
+    top_k: int,
+    name: str,
+    include_embeddings: bool = False,
+) -> list[dict]:
+    """Query one physical collection; return hits sorted by ascending distance."""
+    coll = get_or_create_collection(name=name)
     n = coll.count()
     if n == 0:
         return []
-    result = coll.query(
-        query_embeddings=[query_embedding],
-        n_results=min(top_k, n),
-        include=["metadatas", "distances"],
-    )
+    with timed(CHROMA_QUERY_LATENCY):
+        result = coll.query(
+            query_embeddings=[query_embedding],
+            n_results=min(top_k, n),
+            include=["metadatas", "distances"]
+            + (["embeddings"] if include_embeddings else []),
+        )
     if not result["ids"] or not result["ids"][0]:
         return []
     ids = result["ids"][0]
     metadatas = result["metadatas"][0]
     distances = result["distances"][0]
     # Cosine distance in Chroma: 0 = identical, 2 = opposite. Convert to similarity.
-    return [
+    hits = [
         {
             "id": doc_id,
             "path": meta["path"] if meta else "",
@@ -106,19 +205,81 @@ def search(
         }
         for doc_id, meta, dist in zip(ids, metadatas, distances)
     ]
+    if include_embeddings:
+        for hit, emb in zip(hits, result["embeddings"][0]):
+            hit["embedding"] = emb
+    return hits
+
+
+def search(
+    query_embedding: list[float],
+    top_k: int = 10,
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+    include_embeddings: bool = False,
+) -> list[dict]:
+    """Search for nearest images by embedding across all shards.
+
+    Args:
+        query_embedding: Query vector (text or image embedding).
+        top_k: Number of results to return.
+        collection_name: Logical collection to search.
+        include_embeddings: Also return each hit's stored vector (for re-ranking).
+
+    Returns:
+        List of dicts with keys: id, path, distance, score (and embedding
+        if requested). score is 1 - distance for cosine so higher = more similar.
+    """
+    shards = shard_names(collection_name)
+    with timed(stage="chroma"):
+        if len(shards) == 1:
+            return _search_shard(query_embedding, top_k, shards[0], include_embeddings)
+        pool = _get_search_pool()
+        # Shards are queried in parallel; the enclosing stage records their wall time
+        futures = [
+            pool.submit(
+                _search_shard,
+                query_embedding,
+                top_k,
+                name,
+                include_embeddings,
+            )
+            for name in shards
+        ]
+        per_shard = [f.result() for f in futures]
+        return heapq.nsmallest(
+            top_k,
+            itertools.chain.from_iterable(per_shard),
+            key=lambda h: h["distance"] if h["distance"] is not None else float("inf"),
+        )
 
 
 def clear_collection(collection_name: str = DEFAULT_COLLECTION_NAME) -> None:
-    """Delete and recreate the collection (removes all documents)."""
-    client = _get_client()
-    try:
-        client.delete_collection(name=collection_name)
-    except Exception:
-        pass
-    get_or_create_collection(name=collection_name)
+    """Delete every shard of the collection, including leftovers (removes all documents)."""
+    for name in list_shards(collection_name):
+        _delete_collection(name)
+    if CHROMA_SHARDS <= 1:
+        get_or_create_collection(name=collection_name)
+
+
+def clear_shard(
+    shard: int,
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+    shard_count: int = CHROMA_SHARDS,
+) -> None:
+    """Delete and recreate a single shard's physical collection."""
+    name = shard_collection_name(collection_name, shard, shard_count)
+    _delete_collection(name)
+    get_or_create_collection(name=name)
+
+
+def shard_sizes(collection_name: str = DEFAULT_COLLECTION_NAME) -> list[dict]:
+    """Return name and document count for each configured shard of the collection."""
+    return [
+        {"name": name, "count": get_or_create_collection(name=name).count()}
+        for name in shard_names(collection_name)
+    ]
 
 
 def collection_count(collection_name: str = DEFAULT_COLLECTION_NAME) -> int:
-    """Return the number of documents in the collection."""
-    coll = get_or_create_collection(name=collection_name)
-    return coll.count()
+    """Return the number of documents in the collection (summed over shards)."""
+    return sum(s["count"] for s in shard_sizes(collection_name))
@@ -80,6 +80,12 @@ class _ChromaEmbeddingStubMetaFinder:
 
 
 def install_stub() -> None:
-    """Install the import hook so chromadb gets our stub instead of loading onnx."""
-    if _ChromaEmbeddingStubMetaFinder.STUB_MODULE_NAME not in sys.modules:
-        sys.meta_path.insert(0, _ChromaEmbeddingStubMetaFinder())
+    """Install the import hook so chromadb gets our stub instead of loading onnx.
+
+    Safe to call more than once; the hook is only added the first time.
+    """
+    if _ChromaEmbeddingStubMetaFinder.STUB_MODULE_NAME in sys.modules:
+        return
+    if any(isinstance(f, _ChromaEmbeddingStubMetaFinder) for f in sys.meta_path):
+        return
+    sys.meta_path.insert(0, _ChromaEmbeddingStubMetaFinder())
@@ -13,6 +13,10 @@ GOOGLE_APPLICATION_CREDENTIALS: str = os.getenv("GOOGLE_APPLICATION_CREDENTIALS"
 GCP_PROJECT_ID: str = os.getenv("GCP_PROJECT_ID", "")
 GCP_LOCATION: str = os.getenv("GCP_LOCATION", "us-central1")
 
+# Embedding backend: "vertex" (default) or "fake" (deterministic, offline; for
+# benchmarks and local development without GCP credentials)
+EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "vertex").lower()
+
 # ChromaDB: use user data directory when not set via env
 # Windows: %APPDATA%\LocalImageSearch\chroma_data
 # macOS: ~/Library/Application Support/LocalImageSearch/chroma_data
@@ -23,6 +27,49 @@ _DEFAULT_CHROMA_DIR = os.path.join(
 )
 CHROMA_PERSIST_DIR: str = os.getenv("CHROMA_PERSIST_DIR", _DEFAULT_CHROMA_DIR)
 
+# Optional: add a Server-Timing header (embed, chroma, other, total) to API responses
+ENABLE_SERVER_TIMING: bool = os.getenv("ENABLE_SERVER_TIMING", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Warm up Chroma and the embedding model in a background thread at startup
+# (set to 0 to defer until first use)
+WARMUP_ON_STARTUP: bool = os.getenv("WARMUP_ON_STARTUP", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
+# Sharding: split each logical collection across CHROMA_SHARDS physical Chroma
+# collections. SHARD_STRATEGY "hash" spreads images by file path hash; "prefix"
+# keeps each top-level subfolder of the indexed folder in one shard. Changing
+# either requires a full re-index.
+CHROMA_SHARDS: int = max(int(os.getenv("CHROMA_SHARDS", "1")), 1)
+SHARD_STRATEGY: str = os.getenv("SHARD_STRATEGY", "hash").lower()
+
+# Worker threads for per-shard indexing and concurrent shard search
+INDEX_WORKERS: int = max(int(os.getenv("INDEX_WORKERS", str(CHROMA_SHARDS))), 1)
+SEARCH_WORKERS: int = max(int(os.getenv("SEARCH_WORKERS", "8")), 1)
+
+# Cursor pagination: cached search sessions (count and idle lifetime), candidates
+# fetched up front (in pages), and the deepest result a cursor can reach
+CURSOR_CACHE_SIZE: int = int(os.getenv("CURSOR_CACHE_SIZE", "256"))
+CURSOR_TTL_SECONDS: float = float(os.getenv("CURSOR_TTL_SECONDS", "300"))
+CURSOR_PREFETCH_PAGES: int = max(int(os.getenv("CURSOR_PREFETCH_PAGES", "5")), 1)
+MAX_DEEP_RESULTS: int = int(os.getenv("MAX_DEEP_RESULTS", "1000"))
+
+# Re-ranking of search candidates: "mmr" (diversify near-duplicate bursts),
+# "cluster" (group results with k-means) or "none". MMR_DIVERSITY is the MMR
+# trade-off (0 = pure relevance); RERANK_CANDIDATES is how many candidates are
+# over-fetched for re-ranking.
+RERANK_MODES = ("none", "mmr", "cluster")
+RERANK_MODE: str = os.getenv("RERANK_MODE", "mmr").lower()
+MMR_DIVERSITY: float = float(os.getenv("MMR_DIVERSITY", "0.5"))
+RERANK_CANDIDATES: int = int(os.getenv("RERANK_CANDIDATES", "200"))
+CLUSTER_GROUPS: int = int(os.getenv("CLUSTER_GROUPS", "8"))
+
 # Optional: base path for indexing and serving image files (default: project root)
 IMAGE_BASE_PATH: str = os.getenv("IMAGE_BASE_PATH", ".")
 
@@ -34,6 +81,20 @@ def get_base_path_resolved() -> Path:
 
 def validate_config() -> None:
     """Validate that required config is present. Raises ValueError if invalid."""
+    if RERANK_MODE not in RERANK_MODES:
+        raise ValueError(
+            f"RERANK_MODE must be one of {', '.join(RERANK_MODES)}, got: {RERANK_MODE}"
+        )
+    if not 0.0 <= MMR_DIVERSITY <= 1.0:
+        raise ValueError(f"MMR_DIVERSITY must be between 0 and 1, got: {MMR_DIVERSITY}")
+    if CLUSTER_GROUPS < 1:
+        raise ValueError(f"CLUSTER_GROUPS must be at least 1, got: {CLUSTER_GROUPS}")
+    if EMBEDDING_BACKEND == "fake":
+        return
+    if EMBEDDING_BACKEND != "vertex":
+        raise ValueError(
+            f"EMBEDDING_BACKEND must be 'vertex' or 'fake', got: {EMBEDDING_BACKEND}"
+        )
     if not GOOGLE_APPLICATION_CREDENTIALS:
         raise ValueError(
             "GOOGLE_APPLICATION_CREDENTIALS must be set (path to service account JSON)"
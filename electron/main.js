@@ -83,7 +83,12 @@ function spawnBackend() {
     });
 
     proc.stderr.on('data', (data) => {
-      console.error('Backend stderr:', data.toString());
+      const msg = data.toString();
+      console.error('Backend stderr:', msg);
+      // Uvicorn logs to stderr
+      if (msg.includes('Uvicorn running') || msg.includes('Application startup complete')) {
+        resolve();
+      }
     });
 
     proc.on('error', (err) => {
@@ -102,23 +107,23 @@ function spawnBackend() {
   });
 }
 
-function waitForBackend(retries = 30) {
+function waitForBackend(retries = 150) {
   const http = require('http');
   return new Promise((resolve) => {
     const check = (attempt) => {
-      const req = http.get(`${API_URL}/health`, (res) => {
+      const req = http.get(`${API_URL}/health/live`, (res) => {
         if (res.statusCode === 200) resolve();
         else if (attempt >= retries) resolve();
-        else setTimeout(() => check(attempt + 1), 500);
+        else setTimeout(() => check(attempt + 1), 100);
       });
       req.on('error', () => {
         if (attempt >= retries) resolve();
-        else setTimeout(() => check(attempt + 1), 500);
+        else setTimeout(() => check(attempt + 1), 100);
       });
       req.setTimeout(2000, () => {
         req.destroy();
         if (attempt >= retries) resolve();
-        else setTimeout(() => check(attempt + 1), 500);
+        else setTimeout(() => check(attempt + 1), 100);
       });
     };
     check(0);
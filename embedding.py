@@ -1,27 +1,49 @@
-"""Vertex AI multimodal embeddings for images and text."""
+"""Vertex AI multimodal embeddings for images and text.
+
+Set EMBEDDING_BACKEND=fake to use deterministic synthetic vectors instead
+(see fake_embedding.py). The Vertex SDK is imported on first use, not at module
+load, so the API process starts without it.
+"""
 
 from __future__ import annotations
 
-import vertexai
-from vertexai.vision_models import Image as VertexImage
-from vertexai.vision_models import MultiModalEmbeddingModel
+import threading
+from typing import TYPE_CHECKING
+
+from config import EMBEDDING_BACKEND, GCP_LOCATION, GCP_PROJECT_ID, validate_config
+from metrics import EMBEDDING_LATENCY, timed
 
-from config import GCP_LOCATION, GCP_PROJECT_ID, validate_config
+if TYPE_CHECKING:
+    from vertexai.vision_models import MultiModalEmbeddingModel
 
 # Lazy-initialized model
 _mm_model: MultiModalEmbeddingModel | None = None
+_model_lock = threading.Lock()
 
 
 def _get_model() -> MultiModalEmbeddingModel:
     """Return the multimodal embedding model, initializing Vertex and model if needed."""
     global _mm_model
     if _mm_model is None:
-        validate_config()
-        vertexai.init(project=GCP_PROJECT_ID, location=GCP_LOCATION)
-        _mm_model = MultiModalEmbeddingModel.from_pretrained("multimodalembedding")
+        with _model_lock:
+            if _mm_model is None:
+                validate_config()
+                import vertexai
+                from vertexai.vision_models import MultiModalEmbeddingModel
+
+                vertexai.init(project=GCP_PROJECT_ID, location=GCP_LOCATION)
+                _mm_model = MultiModalEmbeddingModel.from_pretrained("multimodalembedding")
     return _mm_model
 
 
+def warm_up() -> None:
+    """Load the embedding backend ahead of the first request."""
+    if EMBEDDING_BACKEND == "fake":
+        import fake_embedding  # noqa: F401
+        return
+    _get_model()
+
+
 def get_image_embedding(image_path: str, dimension: int = 1408) -> list[float]:
     """Generate an image embedding from a local file path.
 
@@ -32,9 +54,18 @@ def get_image_embedding(image_path: str, dimension: int = 1408) -> list[float]:
     Returns:
         A list of floats (embedding vector).
     """
+    # Only the embedding call is timed; model loading is reported by startup warm-up
+    if EMBEDDING_BACKEND == "fake":
+        import fake_embedding
+
+        with timed(EMBEDDING_LATENCY, stage="embed", kind="image"):
+            return fake_embedding.get_image_embedding(image_path, dimension=dimension)
+    from vertexai.vision_models import Image as VertexImage
+
     model = _get_model()
     image = VertexImage.load_from_file(image_path)
-    embedding = model.get_embeddings(image=image, dimension=dimension)
+    with timed(EMBEDDING_LATENCY, stage="embed", kind="image"):
+        embedding = model.get_embeddings(image=image, dimension=dimension)
     return list(embedding.image_embedding)
 
 
@@ -48,9 +79,15 @@ def get_text_embedding(text: str, dimension: int = 1408) -> list[float]:
     Returns:
         A list of floats (embedding vector).
     """
+    if EMBEDDING_BACKEND == "fake":
+        import fake_embedding
+
+        with timed(EMBEDDING_LATENCY, stage="embed", kind="text"):
+            return fake_embedding.get_text_embedding(text, dimension=dimension)
     model = _get_model()
-    embedding = model.get_embeddings(
-        contextual_text=text,
-        dimension=dimension,
-    )
+    with timed(EMBEDDING_LATENCY, stage="embed", kind="text"):
+        embedding = model.get_embeddings(
+            contextual_text=text,
+            dimension=dimension,
+        )
     return list(embedding.text_embedding)
@@ -0,0 +1,42 @@
+"""Deterministic synthetic embeddings used in place of Vertex AI.
+
+Selected with EMBEDDING_BACKEND=fake. Vectors are unit-length and derived from a
+hash of the input (file bytes for images, the string for text), so the same
+input always maps to the same vector and runs can be compared over time.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+
+
+def _vector_from_digest(digest: bytes, dimension: int) -> list[float]:
+    """Return a unit-length float vector seeded from a hash digest."""
+    seed = int.from_bytes(digest[:8], "little")
+    rng = np.random.default_rng(seed)
+    vec = rng.standard_normal(dimension, dtype=np.float32)
+    vec /= np.linalg.norm(vec)
+    return vec.tolist()
+
+
+def random_unit_vectors(count: int, dimension: int, seed: int = 0) -> np.ndarray:
+    """Return a (count, dimension) float32 array of unit-length random vectors."""
+    rng = np.random.default_rng(seed)
+    vecs = rng.standard_normal((count, dimension), dtype=np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+
+def get_image_embedding(image_path: str, dimension: int = 1408) -> list[float]:
+    """Return a synthetic embedding for an image, seeded from its file contents."""
+    with open(image_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).digest()
+    return _vector_from_digest(digest, dimension)
+
+
+def get_text_embedding(text: str, dimension: int = 1408) -> list[float]:
+    """Return a synthetic embedding for a text query, seeded from the text."""
+    digest = hashlib.sha256(text.encode()).digest()
+    return _vector_from_digest(digest, dimension)
@@ -68,8 +68,13 @@ const els = {
   topKImage: document.getElementById('topKImage'),
   topKSimilar: document.getElementById('topKSimilar'),
   minScore: document.getElementById('minScore'),
+  scrollSentinel: document.getElementById('scrollSentinel'),
 };
 
+// Infinite scroll: the server keeps each search's query embedding and candidates
+// behind a cursor, so further pages cost no new embedding.
+const paging = { nextCursor: null, pageSize: 20, loading: false };
+
 function setStatus(el, message, type) {
   el.textContent = message;
   el.className = 'status' + (type ? ' ' + type : '');
@@ -167,11 +172,14 @@ els.uploadArea.addEventListener('drop', (e) => {
   }
 });
 
-function renderResults(results) {
-  els.resultCount.textContent = results.length;
-  els.resultsGrid.innerHTML = '';
+function renderResults(results, append = false) {
+  if (!append) {
+    els.resultsGrid.innerHTML = '';
+    paging.nextCursor = null;
+  }
   const emptyState = document.getElementById('emptyState');
-  if (results.length === 0) {
+  if (!append && results.length === 0) {
+    els.resultCount.textContent = 0;
     emptyState.style.display = 'block';
     els.resultsGrid.style.display = 'none';
     return;
@@ -183,9 +191,14 @@ function renderResults(results) {
     const url = (API_BASE || '') + '/files?path=' + pathEnc;
     const card = document.createElement('div');
     card.className = 'result-card';
+    // Set when the backend clusters results (rerank=cluster); groups are numbered from 0
+    const groupBadge = r.group == null
+      ? ''
+      : '<div class="group-badge" title="Similar-image group">Group ' + (r.group + 1) + '</div>';
     card.innerHTML =
       '<div class="img-wrap">' +
       '<div class="rank-badge">' + r.rank + '</div>' +
+      groupBadge +
       '<img src="' + url + '" alt="Result ' + r.rank + '" loading="lazy">' +
       '</div>' +
       '<div class="meta">Score: <span class="score-value">' + r.score.toFixed(3) + '</span></div>';
@@ -197,8 +210,57 @@ function renderResults(results) {
     img.addEventListener('click', () => window.open(url, '_blank'));
     els.resultsGrid.appendChild(card);
   });
+  els.resultCount.textContent = els.resultsGrid.children.length;
+}
+
+function startPaging(data, pageSize) {
+  paging.nextCursor = data.next_cursor || null;
+  paging.pageSize = pageSize;
+  loadMoreIfVisible();
+}
+
+// The observer only fires when the sentinel enters or leaves view, so keep loading
+// while it stays visible (short pages, tall windows, no scrollbar yet)
+function loadMoreIfVisible() {
+  // offsetParent is null while the results panel is hidden
+  if (!paging.nextCursor || paging.loading || !els.scrollSentinel.offsetParent) return;
+  const rect = els.scrollSentinel.getBoundingClientRect();
+  if (rect.top < window.innerHeight && rect.bottom >= 0) loadMore();
 }
 
+async function loadMore() {
+  if (!paging.nextCursor || paging.loading) return;
+  paging.loading = true;
+  const cursor = paging.nextCursor;
+  try {
+    const res = await fetch(
+      (API_BASE || '') +
+        '/search?cursor=' +
+        encodeURIComponent(cursor) +
+        '&top_k=' +
+        paging.pageSize
+    );
+    const data = await res.json().catch(() => ({}));
+    // A new search may have started while this page was loading
+    if (paging.nextCursor !== cursor) return;
+    if (!res.ok) {
+      paging.nextCursor = null;
+      return;
+    }
+    renderResults(data.results || [], true);
+    paging.nextCursor = data.next_cursor || null;
+  } catch (e) {
+    paging.nextCursor = null;
+  } finally {
+    paging.loading = false;
+  }
+  loadMoreIfVisible();
+}
+
+new IntersectionObserver((entries) => {
+  if (entries.some((e) => e.isIntersecting)) loadMore();
+}).observe(els.scrollSentinel);
+
 els.searchTextBtn.addEventListener('click', async () => {
   const q = els.queryText.value.trim();
   if (!q) {
@@ -220,6 +282,7 @@ els.searchTextBtn.addEventListener('click', async () => {
     }
     setStatus(els.searchStatus, 'Found ' + (data.results?.length || 0) + ' results', 'success');
     renderResults(data.results || []);
+    startPaging(data, topK);
   } catch (e) {
     setStatus(els.searchStatus, 'Error: ' + e.message, 'error');
     renderResults([]);
@@ -256,6 +319,7 @@ els.searchImageBtn.addEventListener('click', async () => {
     }
     setStatus(els.searchStatus, 'Found ' + (data.results?.length || 0) + ' similar images', 'success');
     renderResults(data.results || []);
+    startPaging(data, topK);
   } catch (e) {
     setStatus(els.searchStatus, 'Error: ' + e.message, 'error');
     renderResults([]);
@@ -292,6 +356,7 @@ els.searchSimilarBtn.addEventListener('click', async () => {
     }
     setStatus(els.searchStatus, 'Found ' + (data.results?.length || 0) + ' similar images', 'success');
     renderResults(data.results || []);
+    startPaging(data, topK);
   } catch (e) {
     setStatus(els.searchStatus, 'Error: ' + e.message, 'error');
     renderResults([]);
@@ -3,11 +3,20 @@
 from __future__ import annotations
 
 import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from chroma_store import add_images, clear_collection
-from config import get_base_path_resolved
+from chroma_store import (
+    ADD_BATCH_SIZE,
+    add_images,
+    clear_collection,
+    clear_shard,
+    shard_collection_name,
+)
+from config import CHROMA_SHARDS, INDEX_WORKERS, SHARD_STRATEGY, get_base_path_resolved
 from embedding import get_image_embedding
+from metrics import IMAGES_INDEXED, INDEX_DURATION, INDEX_THROUGHPUT, record_error, timed
 
 # Supported image extensions
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
@@ -41,6 +50,117 @@ def _collect_image_paths(folder: Path) -> list[Path]:
     return paths
 
 
+def _shard_for_path(path: Path, folder: Path, shard_count: int) -> int:
+    """Return the shard index for an image path under the indexed folder."""
+    if shard_count <= 1:
+        return 0
+    if SHARD_STRATEGY == "prefix":
+        # Top-level subfolder (files directly in folder share the "" prefix)
+        parts = path.relative_to(folder).parts
+        key = parts[0] if len(parts) > 1 else ""
+    elif SHARD_STRATEGY == "hash":
+        key = str(path)
+    else:
+        raise ValueError(f"SHARD_STRATEGY must be 'hash' or 'prefix', got: {SHARD_STRATEGY}")
+    return int(hashlib.sha256(key.encode()).hexdigest()[:8], 16) % shard_count
+
+
+def _index_paths(
+    image_paths: list[Path],
+    collection_name: str,
+    dimension: int,
+) -> tuple[int, list[str]]:
+    """Embed images and add them to one physical collection.
+
+    Returns:
+        (number indexed, list of per-image error messages).
+    """
+    ids = []
+    embeddings = []
+    paths = []
+    errors = []
+    indexed = 0
+    for p in image_paths:
+        path_str = str(p)
+        doc_id = hashlib.sha256(path_str.encode()).hexdigest()[:32]
+        try:
+            emb = get_image_embedding(path_str, dimension=dimension)
+        except Exception as e:
+            record_error(e)
+            errors.append(f"{path_str}: {str(e)}")
+            continue
+        ids.append(doc_id)
+        embeddings.append(emb)
+        paths.append(path_str)
+        # Write in batches so memory stays bounded on very large folders
+        if len(ids) >= ADD_BATCH_SIZE:
+            add_images(ids=ids, embeddings=embeddings, paths=paths,
+                       collection_name=collection_name)
+            indexed += len(ids)
+            ids, embeddings, paths = [], [], []
+    if ids:
+        add_images(ids=ids, embeddings=embeddings, paths=paths,
+                   collection_name=collection_name)
+        indexed += len(ids)
+    return indexed, errors
+
+
+def _index_shards(
+    shard_paths: dict[int, list[Path]],
+    collection_name: str,
+    shard_count: int,
+    dimension: int,
+) -> tuple[int, list[str]]:
+    """Index each shard's images, running shards in parallel threads."""
+    if not shard_paths:
+        return 0, []
+    workers = min(INDEX_WORKERS, len(shard_paths))
+    # Shards overlap in time, so the request is charged wall time for the whole fan-out
+    with timed(stage="index"), ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="index-shard"
+    ) as pool:
+        futures = [
+            pool.submit(
+                _index_paths,
+                paths,
+                shard_collection_name(collection_name, shard, shard_count),
+                dimension,
+            )
+            for shard, paths in sorted(shard_paths.items())
+        ]
+        results = [f.result() for f in futures]
+    indexed = sum(n for n, _ in results)
+    errors = [err for _, errs in results for err in errs]
+    return indexed, errors
+
+
+def _finish_index_run(
+    indexed: int,
+    errors: list[str],
+    total: int,
+    start: float,
+) -> int:
+    """Log errors, raise if nothing was indexed, and record run metrics."""
+    if errors:
+        import logging
+        logger = logging.getLogger(__name__)
+        for err in errors[:5]:  # Log first 5 errors
+            logger.warning(f"Failed to index image: {err}")
+        if len(errors) > 5:
+            logger.warning(f"... and {len(errors) - 5} more errors")
+
+    if not indexed and errors:
+        error_msg = f"Failed to generate embeddings for all {total} images. "
+        error_msg += f"First error: {errors[0]}" if errors else ""
+        raise RuntimeError(error_msg)
+    elapsed = time.perf_counter() - start
+    IMAGES_INDEXED.inc(indexed)
+    INDEX_DURATION.observe(elapsed)
+    if elapsed > 0:
+        INDEX_THROUGHPUT.set(indexed / elapsed)
+    return indexed
+
+
 def index_folder(
     folder_path: str,
     collection_name: str = "images",
@@ -49,6 +169,9 @@ def index_folder(
 ) -> int:
     """Index all images in a folder into ChromaDB.
 
+    With CHROMA_SHARDS > 1, images are split across shard collections and each
+    shard is indexed in its own thread.
+
     Args:
         folder_path: Path to folder (relative to IMAGE_BASE_PATH or absolute
             under base).
@@ -63,6 +186,7 @@ def index_folder(
         ValueError: If folder path is invalid.
         Exception: If embedding generation fails for all images.
     """
+    start = time.perf_counter()
     folder = _resolve_folder_path(folder_path)
     image_paths = _collect_image_paths(folder)
     if not image_paths:
@@ -70,39 +194,50 @@ def index_folder(
             clear_collection(collection_name=collection_name)
         raise ValueError(f"No image files found in {folder_path}. Supported extensions: {', '.join(IMAGE_EXTENSIONS)}")
 
+    shard_paths: dict[int, list[Path]] = {}
+    for p in image_paths:
+        shard_paths.setdefault(_shard_for_path(p, folder, CHROMA_SHARDS), []).append(p)
+
     if clear_first:
         clear_collection(collection_name=collection_name)
 
-    ids = []
-    embeddings = []
-    paths = []
-    errors = []
-    for p in image_paths:
-        path_str = str(p)
-        doc_id = hashlib.sha256(path_str.encode()).hexdigest()[:32]
-        try:
-            emb = get_image_embedding(path_str, dimension=dimension)
-        except Exception as e:
-            errors.append(f"{path_str}: {str(e)}")
-            continue
-        ids.append(doc_id)
-        embeddings.append(emb)
-        paths.append(path_str)
-    
-    if errors:
-        import logging
-        logger = logging.getLogger(__name__)
-        for err in errors[:5]:  # Log first 5 errors
-            logger.warning(f"Failed to index image: {err}")
-        if len(errors) > 5:
-            logger.warning(f"... and {len(errors) - 5} more errors")
+    indexed, errors = _index_shards(shard_paths, collection_name, CHROMA_SHARDS, dimension)
+    return _finish_index_run(indexed, errors, len(image_paths), start)
 
-    if ids:
-        add_images(ids=ids, embeddings=embeddings, paths=paths,
-                   collection_name=collection_name)
-    else:
-        if errors:
-            error_msg = f"Failed to generate embeddings for all {len(image_paths)} images. "
-            error_msg += f"First error: {errors[0]}" if errors else ""
-            raise RuntimeError(error_msg)
-    return len(ids)
+
+def rebuild_shard(
+    folder_path: str,
+    shard: int,
+    collection_name: str = "images",
+    dimension: int = 1408,
+) -> int:
+    """Clear and re-index a single shard from the folder it was built from.
+
+    Args:
+        folder_path: Folder originally passed to index_folder.
+        shard: Shard index, 0 <= shard < CHROMA_SHARDS.
+        collection_name: Logical Chroma collection name.
+        dimension: Embedding dimension (must match 1408 for default).
+
+    Returns:
+        Number of images indexed into the shard.
+
+    Raises:
+        ValueError: If the shard index or folder path is invalid.
+    """
+    if not 0 <= shard < CHROMA_SHARDS:
+        raise ValueError(f"shard must be between 0 and {CHROMA_SHARDS - 1}, got {shard}")
+    start = time.perf_counter()
+    folder = _resolve_folder_path(folder_path)
+    image_paths = [
+        p for p in _collect_image_paths(folder)
+        if _shard_for_path(p, folder, CHROMA_SHARDS) == shard
+    ]
+    clear_shard(shard, collection_name=collection_name, shard_count=CHROMA_SHARDS)
+    indexed, errors = _index_shards(
+        {shard: image_paths} if image_paths else {},
+        collection_name,
+        CHROMA_SHARDS,
+        dimension,
+    )
+    return _finish_index_run(indexed, errors, len(image_paths), start)
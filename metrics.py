@@ -0,0 +1,256 @@
+"""In-process metrics with Prometheus text exposition and Server-Timing support.
+
+Metrics live in module-level registries and are rendered by GET /metrics. Request
+stages (embedding, Chroma query) are also accumulated per request in a context
+variable so the API can emit a Server-Timing header when enabled.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Latency buckets in seconds (Vertex calls sit in the 0.1-2s range, Chroma well below)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_registry: list[_Metric] = []
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a Prometheus label set, e.g. {kind="text",le="0.1"}."""
+    parts = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value; integers without a trailing .0."""
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """Base class: a named metric family with fixed label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        _registry.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with _lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}"
+            for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = value
+
+    def _samples(self) -> list[str]:
+        with _lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}"
+            for key, v in items
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values (seconds for latencies)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count], sum
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with _lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._sums[key] += value
+
+    def _samples(self) -> list[str]:
+        with _lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        lines = []
+        for key, counts, total in items:
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.label_names, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {counts[-1]}")
+            plain = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {counts[-1]}")
+        return lines
+
+
+EMBEDDING_LATENCY = Histogram(
+    "embedding_latency_seconds", "Embedding generation latency.", ["kind"]
+)
+CHROMA_QUERY_LATENCY = Histogram(
+    "chroma_query_latency_seconds", "Chroma nearest-neighbour query latency."
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "End-to-end request latency.", ["method", "endpoint"]
+)
+REQUESTS = Counter(
+    "http_requests_total", "Requests served.", ["method", "endpoint", "status"]
+)
+IMAGES_INDEXED = Counter("images_indexed_total", "Images embedded and stored.")
+INDEX_DURATION = Histogram(
+    "index_duration_seconds",
+    "Duration of a full index_folder run.",
+    buckets=(1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+)
+INDEX_THROUGHPUT = Gauge(
+    "index_last_throughput_images_per_second", "Throughput of the most recent index run."
+)
+ERRORS = Counter("errors_total", "Errors by exception type.", ["type"])
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups.", ["cache", "result"])
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "Hits divided by lookups since start.", ["cache"])
+
+
+def record_error(exc: BaseException) -> None:
+    """Count an error under its exception class name."""
+    ERRORS.inc(type=type(exc).__name__)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss and update that cache's hit ratio."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+    hits = CACHE_REQUESTS.get(cache=cache, result="hit")
+    misses = CACHE_REQUESTS.get(cache=cache, result="miss")
+    CACHE_HIT_RATIO.set(hits / (hits + misses), cache=cache)
+
+
+def render_prometheus() -> str:
+    """Render all registered metrics in Prometheus text format (version 0.0.4)."""
+    return "\n".join(m.render() for m in _registry) + "\n"
+
+
+# Per-request stage durations (seconds) for the Server-Timing header; None outside a request
+_stage_timings: ContextVar[dict[str, float] | None] = ContextVar("stage_timings", default=None)
+
+
+def begin_request_timing() -> dict[str, float]:
+    """Start collecting stage timings for the current request and return the store."""
+    timings: dict[str, float] = {}
+    _stage_timings.set(timings)
+    return timings
+
+
+def add_stage_time(stage: str, seconds: float) -> None:
+    """Add seconds to a named stage of the current request, if one is being timed."""
+    timings = _stage_timings.get()
+    if timings is not None:
+        with _lock:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(
+    histogram: Histogram | None = None,
+    stage: str | None = None,
+    **labels: str,
+) -> Iterator[None]:
+    """Time a block, observing histogram (with labels) and adding to a request stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(elapsed, **labels)
+        if stage is not None:
+            add_stage_time(stage, elapsed)
+
+
+def server_timing_header(timings: dict[str, float], total: float) -> str:
+    """Format stage timings as a Server-Timing header value (durations in ms).
+
+    Time not attributed to a stage (routing, validation, serialization) is
+    reported as "other".
+    """
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    other = max(total - sum(timings.values()), 0.0)
+    parts.append(f"other;dur={other * 1000:.1f}")
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
@@ -3,15 +3,58 @@
 
 from __future__ import annotations
 
+# Imported first so startup timings are measured from the start of the process.
+import startup  # noqa: F401
+
 import argparse
+import subprocess
 import sys
+from pathlib import Path
+
+
+def profile_imports(top: int = 25) -> int:
+    """Print the slowest imports of the api module using python -X importtime."""
+    if getattr(sys, "frozen", False):
+        print("--profile-imports needs a source checkout (not the bundled executable)")
+        return 1
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api"],
+        capture_output=True,
+        text=True,
+        # Run from the project directory so "import api" works from any cwd
+        cwd=Path(__file__).resolve().parent,
+    )
+    if proc.returncode != 0:
+        # The import failed; show why rather than a table of interpreter startup imports
+        print(proc.stderr, file=sys.stderr, end="")
+        return proc.returncode
+    rows = []
+    for line in proc.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+    return proc.returncode
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Local Image Search API")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind")
+    parser.add_argument(
+        "--profile-imports",
+        action="store_true",
+        help="Print an import-time breakdown of the API module and exit",
+    )
     args = parser.parse_args()
 
+    if args.profile_imports:
+        sys.exit(profile_imports())
+
     import uvicorn
     uvicorn.run(
         "api:app",
@@ -0,0 +1,258 @@
+"""Cursor-based pagination over search results.
+
+The first page of a search stores the query embedding and the candidates fetched
+so far in a short-lived, bounded LRU cache keyed by a random session id. Later
+pages are served from the cached candidates, or by re-querying Chroma with a
+larger k using the stored embedding, so a query is embedded once per session
+rather than once per page. When re-ranking is on, each batch of newly fetched
+candidates is re-ranked (see rerank.py) before it is appended, so pages already
+served never change. Batch search runs through the same session code via
+search_top_k, without keeping a cursor.
+
+A cursor is "<session id>.<offset>".
+"""
+
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from chroma_store import search as chroma_search
+from config import (
+    CLUSTER_GROUPS,
+    CURSOR_CACHE_SIZE,
+    CURSOR_PREFETCH_PAGES,
+    CURSOR_TTL_SECONDS,
+    MAX_DEEP_RESULTS,
+    MMR_DIVERSITY,
+    RERANK_CANDIDATES,
+    RERANK_MODE,
+    RERANK_MODES,
+)
+from metrics import record_cache_lookup
+
+
+@dataclass
+class SearchSession:
+    """Query embedding and the candidates fetched so far for one search."""
+
+    query_embedding: list[float]
+    collection_name: str
+    min_score: float | None = None
+    rerank: str = "none"
+    diversity: float = MMR_DIVERSITY
+    groups: int = CLUSTER_GROUPS
+    hits: list[dict] = field(default_factory=list)
+    fetched_k: int = 0
+    exhausted: bool = False
+    next_group: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def ensure(self, count: int) -> None:
+        """Fetch candidates until at least count are held or results run out."""
+        with self.lock:
+            while len(self.hits) < count and not self.exhausted:
+                k = min(max(self.fetched_k * 2, count), MAX_DEEP_RESULTS)
+                raw = chroma_search(
+                    query_embedding=self.query_embedding,
+                    top_k=k,
+                    collection_name=self.collection_name,
+                    include_embeddings=self.rerank != "none",
+                )
+                if self.min_score is None:
+                    kept = raw
+                else:
+                    kept = [h for h in raw if h["score"] >= self.min_score]
+                seen = {h["id"] for h in self.hits}
+                self.hits.extend(self._rerank([h for h in kept if h["id"] not in seen]))
+                self.fetched_k = k
+                # Hits are sorted by score, so stop once min_score cuts any off
+                self.exhausted = len(raw) < k or k >= MAX_DEEP_RESULTS or len(kept) < len(raw)
+
+    def _rerank(self, hits: list[dict]) -> list[dict]:
+        """Re-rank a batch of new candidates; cluster ids continue across batches."""
+        if self.rerank == "none":
+            return hits
+        from rerank import rerank_hits
+
+        hits = rerank_hits(
+            hits,
+            self.query_embedding,
+            self.rerank,
+            diversity=self.diversity,
+            groups=self.groups,
+        )
+        if self.rerank == "cluster" and hits:
+            for h in hits:
+                h["group"] += self.next_group
+            self.next_group = max(h["group"] for h in hits) + 1
+        return hits
+
+
+class CursorCache:
+    """Thread-safe LRU of search sessions with a per-entry time to live."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, SearchSession]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session: SearchSession) -> str:
+        """Store a session and return its id, evicting the least recently used."""
+        session_id = secrets.token_urlsafe(12)
+        with self._lock:
+            self._entries[session_id] = (time.monotonic() + self.ttl_seconds, session)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return session_id
+
+    def get(self, session_id: str) -> SearchSession | None:
+        """Return a live session (refreshing its TTL), or None if missing/expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry[0] < now:
+                del self._entries[session_id]
+                entry = None
+            if entry is not None:
+                self._entries[session_id] = (now + self.ttl_seconds, entry[1])
+                self._entries.move_to_end(session_id)
+        record_cache_lookup("search_cursor", hit=entry is not None)
+        return entry[1] if entry is not None else None
+
+
+_cache = CursorCache(CURSOR_CACHE_SIZE, CURSOR_TTL_SECONDS)
+
+
+def _page(
+    session_id: str | None,
+    session: SearchSession,
+    offset: int,
+    page_size: int,
+) -> tuple[list[dict], str | None]:
+    """Return hits [offset, offset + page_size) and the cursor for the next page."""
+    end = offset + page_size
+    # Look one past the page so we only hand out a cursor when more results exist
+    session.ensure(end + 1)
+    hits = session.hits[offset:end]
+    if len(session.hits) <= end:
+        return hits, None
+    if session_id is None:
+        session_id = _cache.put(session)
+    return hits, f"{session_id}.{end}"
+
+
+def _open_session(
+    query_embedding: list[float],
+    collection_name: str,
+    page_size: int,
+    pages: int,
+    min_score: float | None,
+    rerank: str,
+    diversity: float,
+    groups: int,
+) -> SearchSession:
+    """Create a session holding pages * page_size candidates up front.
+
+    When re-ranking, at least RERANK_CANDIDATES are over-fetched so the
+    re-ranker has alternatives to promote.
+
+    Raises:
+        ValueError: If page_size is below 1 or rerank is not a known mode.
+    """
+    if page_size < 1:
+        raise ValueError(f"page_size must be at least 1, got: {page_size}")
+    if rerank not in RERANK_MODES:
+        raise ValueError(f"rerank must be one of {', '.join(RERANK_MODES)}, got: {rerank}")
+    session = SearchSession(
+        query_embedding=query_embedding,
+        collection_name=collection_name,
+        min_score=min_score,
+        rerank=rerank,
+        diversity=diversity,
+        groups=groups,
+    )
+    prefetch = page_size * pages
+    if rerank != "none":
+        prefetch = max(prefetch, RERANK_CANDIDATES)
+    session.ensure(min(prefetch, MAX_DEEP_RESULTS))
+    return session
+
+
+def start_search(
+    query_embedding: list[float],
+    collection_name: str,
+    page_size: int,
+    min_score: float | None = None,
+    rerank: str = RERANK_MODE,
+    diversity: float = MMR_DIVERSITY,
+    groups: int = CLUSTER_GROUPS,
+) -> tuple[list[dict], str | None]:
+    """Run the first page of a search.
+
+    Fetches CURSOR_PREFETCH_PAGES pages of candidates up front (at least
+    RERANK_CANDIDATES when re-ranking) so the next few pages need no Chroma
+    query at all.
+
+    Args:
+        rerank: "none", "mmr" (diversify) or "cluster" (group results).
+        diversity: MMR trade-off, 0 = pure relevance.
+        groups: Number of clusters in "cluster" mode.
+
+    Returns:
+        (hits for the first page, cursor for the next page or None).
+
+    Raises:
+        ValueError: If page_size is below 1 or rerank is not a known mode.
+    """
+    session = _open_session(
+        query_embedding, collection_name, page_size, CURSOR_PREFETCH_PAGES,
+        min_score, rerank, diversity, groups,
+    )
+    return _page(None, session, 0, page_size)
+
+
+def search_top_k(
+    query_embedding: list[float],
+    collection_name: str,
+    top_k: int,
+    rerank: str = RERANK_MODE,
+    diversity: float = MMR_DIVERSITY,
+    groups: int = CLUSTER_GROUPS,
+) -> list[dict]:
+    """Return the top_k (re-ranked) hits of a one-off search; no cursor is kept.
+
+    Raises:
+        ValueError: If top_k is below 1 or rerank is not a known mode.
+    """
+    session = _open_session(
+        query_embedding, collection_name, top_k, 1, None, rerank, diversity, groups
+    )
+    return session.hits[:top_k]
+
+
+def continue_search(cursor: str, page_size: int) -> tuple[list[dict], int, str | None]:
+    """Return the page a cursor points at.
+
+    Returns:
+        (hits, offset of the first hit, cursor for the next page or None).
+
+    Raises:
+        ValueError: If the cursor is malformed or page_size is below 1.
+        LookupError: If the cursor's session has expired or been evicted.
+    """
+    if page_size < 1:
+        raise ValueError(f"page_size must be at least 1, got: {page_size}")
+    session_id, sep, offset_str = cursor.rpartition(".")
+    if not sep or not session_id or not offset_str.isdigit():
+        raise ValueError("Invalid cursor")
+    session = _cache.get(session_id)
+    if session is None:
+        raise LookupError("Cursor expired; run the search again")
+    offset = int(offset_str)
+    hits, next_cursor = _page(session_id, session, offset, page_size)
+    return hits, offset, next_cursor
@@ -0,0 +1,123 @@
+"""Startup profiling and background warm-up for the API process.
+
+Heavy SDKs (chromadb, the Vertex AI stack) are not imported when the API module
+loads. A background thread imports them, opens the Chroma client and loads the
+embedding model, recording how long each step took. /health/ready reports
+whether that has finished; /debug/startup returns the full timing report.
+
+Times are measured from when this module is first imported, which run_api.py
+does before anything else.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+
+_origin = time.perf_counter()
+_lock = threading.Lock()
+_milestones: dict[str, float] = {}
+_imports: dict[str, float] = {}
+_components: dict[str, dict] = {
+    "index": {"state": "pending"},
+    "embedding": {"state": "pending"},
+}
+_warmup_thread: threading.Thread | None = None
+
+
+def elapsed() -> float:
+    """Seconds since startup profiling began."""
+    return time.perf_counter() - _origin
+
+
+def mark(name: str) -> None:
+    """Record the first time a named milestone is reached (e.g. "first_request")."""
+    with _lock:
+        _milestones.setdefault(name, round(elapsed(), 4))
+
+
+def timed_import(module_name: str) -> object:
+    """Import a module, recording how long it took if it was not already loaded."""
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    duration = time.perf_counter() - start
+    with _lock:
+        _imports.setdefault(module_name, round(duration, 4))
+    return module
+
+
+def _warm_component(name: str, steps: list) -> None:
+    """Run warm-up steps for one component and record its state."""
+    with _lock:
+        _components[name] = {"state": "warming"}
+    start = time.perf_counter()
+    try:
+        for step in steps:
+            step()
+    except Exception as e:
+        state = {"state": "error", "error": str(e)}
+    else:
+        state = {"state": "ready"}
+    state["seconds"] = round(time.perf_counter() - start, 4)
+    with _lock:
+        _components[name] = state
+
+
+def _warm_up() -> None:
+    """Import heavy SDKs and initialize the Chroma client and embedding model."""
+    import chroma_store
+    import embedding
+    from config import EMBEDDING_BACKEND
+
+    # chroma_store records the chromadb import time itself when it opens the client
+    _warm_component("index", [chroma_store.warm_up])
+
+    embedding_steps = []
+    if EMBEDDING_BACKEND == "fake":
+        embedding_steps.append(lambda: timed_import("numpy"))
+    else:
+        embedding_steps.append(lambda: timed_import("vertexai"))
+        embedding_steps.append(lambda: timed_import("vertexai.vision_models"))
+    embedding_steps.append(embedding.warm_up)
+    _warm_component("embedding", embedding_steps)
+    mark("warm")
+
+
+def start_warmup() -> None:
+    """Start the background warm-up thread once; later calls are no-ops."""
+    global _warmup_thread
+    with _lock:
+        if _warmup_thread is not None:
+            return
+        _warmup_thread = threading.Thread(target=_warm_up, name="warmup", daemon=True)
+        _warmup_thread.start()
+
+
+def is_ready() -> bool:
+    """True when every component has warmed up successfully."""
+    with _lock:
+        return all(c["state"] == "ready" for c in _components.values())
+
+
+def readiness() -> dict:
+    """Return per-component warm-up state."""
+    with _lock:
+        components = {name: dict(state) for name, state in _components.items()}
+    return {
+        "ready": all(c["state"] == "ready" for c in components.values()),
+        "components": components,
+    }
+
+
+def report() -> dict:
+    """Return the startup timing report: milestones, heavy imports and warm-up."""
+    with _lock:
+        milestones = dict(_milestones)
+        imports = sorted(_imports.items(), key=lambda kv: kv[1], reverse=True)
+    return {
+        "uptime_seconds": round(elapsed(), 4),
+        "milestones_seconds": milestones,
+        "imports_seconds": dict(imports),
+        **readiness(),
+    }